@@ -4,14 +4,18 @@ API Layer
 FastAPI application providing REST endpoints for knowledge graph construction and natural language question answering.
 """
 
+import hashlib
+import time
 import uuid
 import networkx as nx
+from collections import OrderedDict
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 from .graph_builder import build_graph, get_graph_stats
-from .query_router import answer_question, get_graph_summary
+from .query_router import QueryRouter, answer_question_with_router, get_graph_summary
 
 app = FastAPI(
     title="Semantic Knowledge Graph QA Agent",
@@ -21,6 +25,54 @@ app = FastAPI(
 
 graph_storage: dict[str, dict] = {}
 
+ANSWER_CACHE_TTL_SECONDS = 600.0
+ANSWER_CACHE_MAX_ENTRIES = 1024
+answer_cache: OrderedDict[tuple[str, str], tuple[str, float]] = OrderedDict()
+_graphs_listing_cache: list[dict] | None = None
+
+
+def _get_cached_answer(graph_id: str, question: str) -> str | None:
+    key = (graph_id, question)
+    entry = answer_cache.get(key)
+    if entry is None:
+        return None
+    answer, expires_at = entry
+    if time.monotonic() >= expires_at:
+        del answer_cache[key]
+        return None
+    answer_cache.move_to_end(key)
+    return answer
+
+
+def _cache_answer(graph_id: str, question: str, answer: str) -> None:
+    key = (graph_id, question)
+    answer_cache[key] = (answer, time.monotonic() + ANSWER_CACHE_TTL_SECONDS)
+    answer_cache.move_to_end(key)
+    while len(answer_cache) > ANSWER_CACHE_MAX_ENTRIES:
+        answer_cache.popitem(last=False)
+
+
+def _purge_cached_answers(graph_id: str) -> None:
+    for key in [key for key in answer_cache if key[0] == graph_id]:
+        del answer_cache[key]
+
+
+def _make_etag(graph_id: str, resource: str) -> str:
+    digest = hashlib.sha1(f"{graph_id}:{resource}".encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is None:
+        return False
+    return any(tag.strip() in (etag, f"W/{etag}", "*") for tag in if_none_match.split(','))
+
+
+def _build_graph_entry(texts: list[str]) -> tuple[nx.DiGraph, dict[str, int | float], QueryRouter, str]:
+    graph = build_graph(texts)
+    return graph, get_graph_stats(graph), QueryRouter(graph), get_graph_summary(graph)
+
 
 class IngestRequest(BaseModel):
     texts: list[str]
@@ -30,7 +82,7 @@ class IngestRequest(BaseModel):
 class IngestResponse(BaseModel):
     graph_id: str
     message: str
-    stats: dict[str, int]
+    stats: dict[str, int | float]
     created_at: str
 
 
@@ -38,13 +90,13 @@ class QueryResponse(BaseModel):
     answer: str
     graph_id: str
     question: str
-    stats: dict[str, int]
+    stats: dict[str, int | float]
 
 
 class GraphSummaryResponse(BaseModel):
     graph_id: str
     summary: str
-    stats: dict[str, int]
+    stats: dict[str, int | float]
 
 
 class HealthResponse(BaseModel):
@@ -64,24 +116,28 @@ async def root():
 
 @app.post("/ingest", response_model=IngestResponse)
 async def ingest_texts(request: IngestRequest):
+    global _graphs_listing_cache
     try:
         if not request.texts:
             raise HTTPException(status_code=400, detail="No texts provided")
         graph_id = str(uuid.uuid4())
-        graph = build_graph(request.texts)
-        stats = get_graph_stats(graph)
+        graph, stats, router, summary = await run_in_threadpool(_build_graph_entry, request.texts)
+        now_iso = datetime.now().isoformat()
         graph_storage[graph_id] = {
             'graph': graph,
             'texts': request.texts,
             'description': request.description,
-            'created_at': datetime.now().isoformat(),
-            'stats': stats
+            'created_at': now_iso,
+            'stats': stats,
+            'router': router,
+            'summary': summary
         }
+        _graphs_listing_cache = None
         return IngestResponse(
             graph_id=graph_id,
             message=f"Successfully created knowledge graph with {stats['nodes']} entities and {stats['edges']} relationships",
             stats=stats,
-            created_at=graph_storage[graph_id]['created_at']
+            created_at=now_iso
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -90,14 +146,22 @@ async def ingest_texts(request: IngestRequest):
 @app.get("/query/{graph_id}", response_model=QueryResponse)
 async def query_graph(
     graph_id: str, 
+    request: Request,
+    response: Response,
     question: str = Query(..., description="Natural language question to ask the knowledge graph")
 ):
     try:
         if graph_id not in graph_storage:
             raise HTTPException(status_code=404, detail=f"Graph with ID {graph_id} not found")
+        etag = _make_etag(graph_id, f"query:{question}")
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={'ETag': etag})
         graph_data = graph_storage[graph_id]
-        graph = graph_data['graph']
-        answer = answer_question(graph, question)
+        answer = _get_cached_answer(graph_id, question)
+        if answer is None:
+            answer = await run_in_threadpool(answer_question_with_router, graph_data['router'], question)
+            _cache_answer(graph_id, question, answer)
+        response.headers['ETag'] = etag
         return QueryResponse(
             answer=answer,
             graph_id=graph_id,
@@ -111,16 +175,18 @@ async def query_graph(
 
 
 @app.get("/graphs/{graph_id}/summary", response_model=GraphSummaryResponse)
-async def get_graph_summary_endpoint(graph_id: str):
+async def get_graph_summary_endpoint(graph_id: str, request: Request, response: Response):
     try:
         if graph_id not in graph_storage:
             raise HTTPException(status_code=404, detail=f"Graph with ID {graph_id} not found")
+        etag = _make_etag(graph_id, "summary")
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={'ETag': etag})
         graph_data = graph_storage[graph_id]
-        graph = graph_data['graph']
-        summary = get_graph_summary(graph)
+        response.headers['ETag'] = etag
         return GraphSummaryResponse(
             graph_id=graph_id,
-            summary=summary,
+            summary=graph_data['summary'],
             stats=graph_data['stats']
         )
     except HTTPException:
@@ -131,7 +197,10 @@ async def get_graph_summary_endpoint(graph_id: str):
 
 @app.get("/graphs", response_model=list[dict])
 async def list_graphs():
+    global _graphs_listing_cache
     try:
+        if _graphs_listing_cache is not None:
+            return _graphs_listing_cache
         graphs_info = []
         for graph_id, graph_data in graph_storage.items():
             graphs_info.append({
@@ -141,6 +210,7 @@ async def list_graphs():
                 'stats': graph_data['stats'],
                 'text_count': len(graph_data['texts'])
             })
+        _graphs_listing_cache = graphs_info
         return graphs_info
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -148,10 +218,13 @@ async def list_graphs():
 
 @app.delete("/graphs/{graph_id}")
 async def delete_graph(graph_id: str):
+    global _graphs_listing_cache
     try:
         if graph_id not in graph_storage:
             raise HTTPException(status_code=404, detail=f"Graph with ID {graph_id} not found")
         del graph_storage[graph_id]
+        _purge_cached_answers(graph_id)
+        _graphs_listing_cache = None
         return {"message": f"Successfully deleted graph {graph_id}"}
     except HTTPException:
         raise
@@ -4,88 +4,291 @@ Graph Builder Module
 Builds semantic knowledge graphs from text corpora using LangChain for entity and relation extraction, and NetworkX for graph representation.
 """
 
+import hashlib
+import multiprocessing
 import networkx as nx
+import os
 import re
+import threading
+from collections import OrderedDict, defaultdict
+from collections.abc import Hashable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 
+_ENT_CAP = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+_ENT_QUOTED = re.compile(r'"([^"]*)"')
+
+# One alternation with a named group per relation type, so each chunk is scanned once.
+_RELATION_TYPES = ('is_a', 'has', 'works_at', 'lives_in', 'founded', 'created')
+_REL = re.compile(
+    r'(?P<s>\w+(?:\s+\w+)*)\s+'
+    r'(?:(?P<is_a>is\s+(?:a|an))|(?P<has>has)|(?P<works_at>works\s+at)'
+    r'|(?P<lives_in>lives\s+in)|(?P<founded>founded)|(?P<created>created))'
+    r'\s+(?P<o>\w+(?:\s+\w+)*)',
+    re.IGNORECASE
+)
+
+
+_STOP_WORDS = frozenset({'The', 'This', 'That', 'These', 'Those', 'A', 'An'})
+_PARALLEL_MIN_CHUNKS = 32
+_EXTRACTION_MAX_WORKERS = 4
+EXTRACTION_CACHE_MAX_ENTRIES = 4096
+
+ChunkExtraction = tuple[frozenset[str], tuple[tuple[str, str, str], ...]]
+
+_extraction_cache: OrderedDict[bytes, ChunkExtraction] = OrderedDict()
+_extraction_cache_lock = threading.Lock()
+_extraction_executor: ProcessPoolExecutor | None = None
+_extraction_executor_lock = threading.Lock()
+
+
+def _available_cpus() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+_EXTRACTION_WORKERS = min(_EXTRACTION_MAX_WORKERS, _available_cpus())
+
+
+def _get_extraction_executor() -> ProcessPoolExecutor | None:
+    global _extraction_executor
+    if _EXTRACTION_WORKERS < 2:
+        return None
+    with _extraction_executor_lock:
+        if _extraction_executor is None:
+            # Created lazily from a server worker thread; forking a threaded process can hand
+            # the child a lock held by another thread, so start workers from a clean process.
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _extraction_executor = ProcessPoolExecutor(
+                max_workers=_EXTRACTION_WORKERS, mp_context=multiprocessing.get_context(start_method)
+            )
+        return _extraction_executor
+
+
+def _discard_extraction_executor(executor: ProcessPoolExecutor) -> None:
+    global _extraction_executor
+    with _extraction_executor_lock:
+        if _extraction_executor is executor:
+            _extraction_executor = None
+    executor.shutdown(wait=False)
+
+
+def extract_entities(text: str) -> set[str]:
+    entities = set()
+    capitalized_words = _ENT_CAP.findall(text)
+    entities.update(capitalized_words)
+    quoted_phrases = _ENT_QUOTED.findall(text)
+    entities.update(quoted_phrases)
+    entities = {entity for entity in entities if entity not in _STOP_WORDS and len(entity) > 2}
+    return entities
+
+
+def extract_relations(text: str, entities: set[str]) -> list[tuple[str, str, str]]:
+    relations = []
+    entities_lower = frozenset(map(str.lower, entities))
+    entity_tokens = {token for entity in entities_lower for token in entity.split()}
+    for match in _REL.finditer(text):
+        relation_type = next(r for r in _RELATION_TYPES if match.group(r))
+        subject = match.group('s').strip()
+        obj = match.group('o').strip()
+        if _mentions_entity(subject.lower(), entities_lower, entity_tokens) and \
+           _mentions_entity(obj.lower(), entities_lower, entity_tokens):
+            relations.append((subject, relation_type, obj))
+    return relations
+
+
+def _mentions_entity(phrase_lower: str, entities_lower: frozenset[str], entity_tokens: set[str]) -> bool:
+    if phrase_lower in entities_lower:
+        return True
+    if phrase_lower.split()[0] not in entity_tokens:
+        return False
+    return any(phrase_lower in entity for entity in entities_lower)
+
+
+def extract_chunk(chunk: str) -> ChunkExtraction:
+    entities = extract_entities(chunk)
+    return frozenset(entities), tuple(extract_relations(chunk, entities))
+
+
+def _chunk_key(chunk: str) -> bytes:
+    return hashlib.blake2b(chunk.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+
+
 class KnowledgeGraphBuilder:
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, parallel: bool = True):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.parallel = parallel
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap
         )
 
     def extract_entities(self, text: str) -> set[str]:
-        entities = set()
-        capitalized_words = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', text)
-        entities.update(capitalized_words)
-        quoted_phrases = re.findall(r'"([^"]*)"', text)
-        entities.update(quoted_phrases)
-
-        stop_words = {'The', 'This', 'That', 'These', 'Those', 'A', 'An'}
-        entities = {entity for entity in entities if entity not in stop_words and len(entity) > 2}
-        return entities
+        return extract_entities(text)
 
     def extract_relations(self, text: str, entities: set[str]) -> list[tuple[str, str, str]]:
-        relations = []
-        relation_patterns = [
-            (r'(\w+(?:\s+\w+)*)\s+is\s+(?:a|an)\s+(\w+(?:\s+\w+)*)', 'is_a'),
-            (r'(\w+(?:\s+\w+)*)\s+has\s+(\w+(?:\s+\w+)*)', 'has'),
-            (r'(\w+(?:\s+\w+)*)\s+works\s+at\s+(\w+(?:\s+\w+)*)', 'works_at'),
-            (r'(\w+(?:\s+\w+)*)\s+lives\s+in\s+(\w+(?:\s+\w+)*)', 'lives_in'),
-            (r'(\w+(?:\s+\w+)*)\s+founded\s+(\w+(?:\s+\w+)*)', 'founded'),
-            (r'(\w+(?:\s+\w+)*)\s+created\s+(\w+(?:\s+\w+)*)', 'created'),
-        ]
-        for pattern, relation_type in relation_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                subject = match.group(1).strip()
-                obj = match.group(2).strip()
-                if any(subject.lower() in entity.lower() for entity in entities) and \
-                   any(obj.lower() in entity.lower() for entity in entities):
-                    relations.append((subject, relation_type, obj))
-        return relations
+        return extract_relations(text, entities)
+
+    def extract_chunks(self, text_chunks: list[str]) -> list[ChunkExtraction]:
+        keys = [_chunk_key(chunk) for chunk in text_chunks]
+        extracted = {}
+        with _extraction_cache_lock:
+            for key in keys:
+                if key in _extraction_cache:
+                    _extraction_cache.move_to_end(key)
+                    extracted[key] = _extraction_cache[key]
+        pending = {key: chunk for key, chunk in zip(keys, text_chunks) if key not in extracted}
+        extracted.update(zip(pending, self._extract_uncached(list(pending.values()))))
+        with _extraction_cache_lock:
+            for key in pending:
+                _extraction_cache[key] = extracted[key]
+            while len(_extraction_cache) > EXTRACTION_CACHE_MAX_ENTRIES:
+                _extraction_cache.popitem(last=False)
+        return [extracted[key] for key in keys]
+
+    def _extract_uncached(self, text_chunks: list[str]) -> list[ChunkExtraction]:
+        executor = None
+        if self.parallel and len(text_chunks) >= _PARALLEL_MIN_CHUNKS:
+            executor = _get_extraction_executor()
+        if executor is None:
+            return [extract_chunk(chunk) for chunk in text_chunks]
+        chunksize = max(1, len(text_chunks) // (_EXTRACTION_WORKERS * 4))
+        try:
+            return list(executor.map(extract_chunk, text_chunks, chunksize=chunksize))
+        except BrokenProcessPool:
+            _discard_extraction_executor(executor)
+            return [extract_chunk(chunk) for chunk in text_chunks]
 
     def build_graph_from_chunks(self, text_chunks: list[str]) -> nx.DiGraph:
         graph = nx.DiGraph()
-        for chunk in text_chunks:
-            entities = self.extract_entities(chunk)
+        label2id: dict[str, int] = {}
+        nodes, edges = [], []
+        for entities, relations in self.extract_chunks(text_chunks):
+            lower_map, token_index = build_entity_index(entities)
             for entity in entities:
-                if not graph.has_node(entity):
-                    graph.add_node(entity, type='entity')
-            relations = self.extract_relations(chunk, entities)
+                if entity not in label2id:
+                    label2id[entity] = len(label2id)
+                    nodes.append((label2id[entity], {'label': entity, 'type': 'entity'}))
             for subject, predicate, obj in relations:
-                subject_match = self._find_best_entity_match(subject, entities)
-                obj_match = self._find_best_entity_match(obj, entities)
+                subject_match = self._find_best_entity_match(subject, lower_map, token_index)
+                obj_match = self._find_best_entity_match(obj, lower_map, token_index)
                 if subject_match and obj_match:
-                    graph.add_edge(subject_match, obj_match, relation=predicate)
+                    edges.append((label2id[subject_match], label2id[obj_match], {'relation': predicate}))
+        graph.add_nodes_from(nodes)
+        graph.add_edges_from(edges)
         return graph
 
-    def _find_best_entity_match(self, entity: str, entity_set: set[str]) -> str:
+    def _find_best_entity_match(self, entity: str, lower_map: dict[str, str],
+                                token_index: dict[str, set[str]]) -> str:
         entity_lower = entity.lower()
-        for e in entity_set:
-            if e.lower() == entity_lower:
-                return e
-        for e in entity_set:
-            if entity_lower in e.lower() or e.lower() in entity_lower:
-                return e
-        return None
+        match = lower_map.get(entity_lower)
+        if match is not None:
+            return match
+        containing = find_containing_entities(entity_lower, token_index)
+        return containing[0] if containing else None
+
+
+def build_entity_index(entities: Iterable[str]) -> tuple[dict[str, str], dict[str, set[str]]]:
+    lower_map = {}
+    token_index = defaultdict(set)
+    for entity in entities:
+        entity_lower = entity.lower()
+        lower_map[entity_lower] = entity
+        for token in entity_lower.split():
+            token_index[token].add(entity)
+    return lower_map, token_index
+
+
+def find_containing_entities(entity_lower: str, token_index: dict[str, set[str]]) -> list[str]:
+    candidates = set()
+    for token in entity_lower.split():
+        candidates.update(token_index.get(token, ()))
+    containing = [e for e in candidates if entity_lower in e.lower() or e.lower() in entity_lower]
+    return sorted(containing, key=lambda e: (len(e), e))
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+def _is_line_break(text: str, i: int) -> bool:
+    return text[i - 1] == '\n'
 
 
-def build_graph(texts: list[str]) -> nx.DiGraph:
+def _is_sentence_break(text: str, i: int) -> bool:
+    return text[i - 1] in '.!?' and text[i].isspace()
+
+
+def _is_word_break(text: str, i: int) -> bool:
+    return not (_is_word_char(text[i - 1]) and _is_word_char(text[i]))
+
+
+_CHUNK_BREAKS = (_is_line_break, _is_sentence_break, _is_word_break)
+
+
+def _find_break(text: str, positions: range) -> int | None:
+    for is_break in _CHUNK_BREAKS:
+        for i in positions:
+            if is_break(text, i):
+                return i
+    return None
+
+
+def _fast_chunk(text: str, size: int = 1000, overlap: int = 200) -> list[str]:
+    # Fixed windows whose edges move to the best break inside the overlap region: a line
+    # break, then a sentence end, then a word boundary, else a hard cut. Both neighbours
+    # search the same region (the tail forwards, the head backwards), so nothing is lost
+    # and multi-word entities on one line stay whole in at least one chunk.
+    step = max(1, size - overlap)
+    chunks = []
+    for window_start in range(0, max(1, len(text) - overlap), step):
+        window_end = min(window_start + size, len(text))
+        start, end = window_start, window_end
+        if window_start > 0:
+            found = _find_break(text, range(window_start, min(window_start + overlap, window_end - 1) + 1))
+            if found is not None:
+                start = found
+        if window_end < len(text):
+            found = _find_break(text, range(window_end, max(window_end - overlap, start + 1) - 1, -1))
+            if found is not None:
+                end = found
+        chunk = text[start:end]
+        if chunk.strip():
+            chunks.append(chunk)
+    return chunks
+
+
+def build_graph(texts: list[str], use_text_splitter: bool = False) -> nx.DiGraph:
     if not texts:
         return nx.DiGraph()
     builder = KnowledgeGraphBuilder()
     combined_text = "\n\n".join(texts)
-    chunks = builder.text_splitter.split_text(combined_text)
+    if use_text_splitter:
+        chunks = builder.text_splitter.split_text(combined_text)
+    else:
+        chunks = _fast_chunk(combined_text, builder.chunk_size, builder.chunk_overlap)
     graph = builder.build_graph_from_chunks(chunks)
     return graph
 
 
-def get_graph_stats(graph: nx.DiGraph) -> dict[str, int]:
+def node_label(graph: nx.DiGraph, node: Hashable) -> str:
+    return graph.nodes[node].get('label', node)
+
+
+def get_graph_stats(graph: nx.DiGraph) -> dict[str, int | float]:
     return {
         "nodes": graph.number_of_nodes(),
         "edges": graph.number_of_edges(),
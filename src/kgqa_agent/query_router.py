@@ -4,94 +4,131 @@ Query Router Module
 Processes natural language questions for knowledge graph traversal using LangGraph heuristics.
 """
 
+import heapq
+import math
 import networkx as nx
 import re
-from difflib import SequenceMatcher
+from collections import defaultdict
+from collections.abc import Hashable
+from rapidfuzz import fuzz, process
+
+from .graph_builder import build_entity_index, find_containing_entities, node_label
+
+
+_QUESTION_PATTERNS = (
+    (re.compile(r'what is the relationship between (.*?) and (.*?)\?'), 'relationship', True),
+    (re.compile(r'how is (.*?) related to (.*?)\?'), 'relationship', True),
+    (re.compile(r'what is (.*?)\?'), 'what_is', False),
+    (re.compile(r'what are (.*?)\?'), 'what_is', False),
+    (re.compile(r'who is (.*?)\?'), 'who_is', False),
+    (re.compile(r'who are (.*?)\?'), 'who_is', False),
+)
+_QUESTION_CAP = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+_QUESTION_QUOTED = re.compile(r'"([^"]*)"')
 
 
 class QueryRouter:
     def __init__(self, graph: nx.DiGraph):
         self.graph = graph
-        self.question_patterns = {
-            'relationship': [r'what is the relationship between (.*?) and (.*?)\?',
-                           r'how is (.*?) related to (.*?)\?'],
-            'what_is': [r'what is (.*?)\?', r'what are (.*?)\?'],
-            'who_is': [r'who is (.*?)\?', r'who are (.*?)\?']
-        }
+        self._labels = {node: node_label(graph, node) for node in graph.nodes()}
+        self._nodes_by_label = {label: node for node, label in self._labels.items()}
+        _, self._token_index = build_entity_index(self._nodes_by_label)
+        self._nodes_lower = {node: label.lower() for node, label in self._labels.items()}
+        self._node_by_lower = {label_lower: node for node, label_lower in self._nodes_lower.items()}
+        self._by_len = defaultdict(dict)
+        for node, label_lower in self._nodes_lower.items():
+            self._by_len[len(label_lower)][node] = label_lower
 
     def extract_entities_from_question(self, question: str) -> list[str]:
         entities = []
-        capitalized_words = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', question)
+        capitalized_words = _QUESTION_CAP.findall(question)
         entities.extend(capitalized_words)
-        quoted_phrases = re.findall(r'"([^"]*)"', question)
+        quoted_phrases = _QUESTION_QUOTED.findall(question)
         entities.extend(quoted_phrases)
         question_words = {'What', 'Who', 'Where', 'When', 'How', 'Why', 'Which'}
         entities = [e for e in entities if e not in question_words]
         return entities
 
-    def find_similar_entities(self, entity: str, threshold: float = 0.6) -> list[str]:
-        similar_entities = []
+    def find_similar_entities(self, entity: str, threshold: float = 0.6) -> list[Hashable]:
         entity_lower = entity.lower()
-        for node in self.graph.nodes():
-            node_lower = node.lower()
-            if entity_lower == node_lower:
-                return [node]
-            if entity_lower in node_lower or node_lower in entity_lower:
-                similar_entities.append(node)
-            similarity = SequenceMatcher(None, entity_lower, node_lower).ratio()
-            if similarity >= threshold:
-                similar_entities.append(node)
-        return similar_entities
-
-    def get_entity_information(self, entity: str) -> dict[str, any]:
-        if entity not in self.graph.nodes():
+        exact = self._node_by_lower.get(entity_lower)
+        if exact is not None:
+            return [exact]
+        # Whole-word containment comes from the token index and ranks first; partial words
+        # such as "Pich" for "Sundar Pichai" only turn up in the full substring scan.
+        containing = find_containing_entities(entity_lower, self._token_index)
+        if containing:
+            return [self._nodes_by_label[label] for label in containing]
+        containing = [node for node, label_lower in self._nodes_lower.items()
+                      if entity_lower in label_lower or label_lower in entity_lower]
+        if containing:
+            return containing
+        candidates = self._fuzzy_candidates(len(entity_lower), threshold)
+        matches = process.extract(entity_lower, candidates, scorer=fuzz.ratio,
+                                  score_cutoff=threshold * 100, limit=10)
+        return [node for _, _, node in matches]
+
+    def _fuzzy_candidates(self, length: int, threshold: float) -> dict[Hashable, str]:
+        if threshold <= 0:
+            return self._nodes_lower
+        # fuzz.ratio is 2 * LCS / (len_a + len_b), so it can only reach the threshold
+        # when the shorter string is at least threshold / (2 - threshold) of the longer.
+        min_len = math.ceil(length * threshold / (2 - threshold) - 1e-9)
+        max_len = math.floor(length * (2 - threshold) / threshold + 1e-9)
+        candidates = {}
+        for size, nodes in self._by_len.items():
+            if min_len <= size <= max_len:
+                candidates.update(nodes)
+        return candidates
+
+    def get_entity_information(self, entity: Hashable) -> dict[str, any]:
+        if entity not in self.graph._adj:
             return {}
+        labels = self._labels
+        successors = self.graph._adj[entity]
         info = {
-            'entity': entity,
+            'entity': labels[entity],
             'attributes': dict(self.graph.nodes[entity]),
             'outgoing_relations': [],
             'incoming_relations': [],
-            'neighbors': list(self.graph.neighbors(entity))
+            'neighbors': [labels[neighbor] for neighbor in successors]
         }
-        for neighbor in self.graph.successors(entity):
-            edge_data = self.graph.edges[entity, neighbor]
+        for neighbor, edge_data in successors.items():
             info['outgoing_relations'].append({
-                'target': neighbor,
+                'target': labels[neighbor],
                 'relation': edge_data.get('relation', 'unknown')
             })
-        for predecessor in self.graph.predecessors(entity):
-            edge_data = self.graph.edges[predecessor, entity]
+        for predecessor, edge_data in self.graph._pred[entity].items():
             info['incoming_relations'].append({
-                'source': predecessor,
+                'source': labels[predecessor],
                 'relation': edge_data.get('relation', 'unknown')
             })
         return info
 
-    def find_path_between_entities(self, entity1: str, entity2: str) -> list[tuple[str, str, str]]:
+    def find_path_between_entities(self, entity1: Hashable, entity2: Hashable) -> list[tuple[str, str, str]]:
         try:
             path_nodes = nx.shortest_path(self.graph, entity1, entity2)
             path_relations = []
             for i in range(len(path_nodes) - 1):
                 source = path_nodes[i]
                 target = path_nodes[i + 1]
-                edge_data = self.graph.edges[source, target]
+                edge_data = self.graph._adj[source][target]
                 relation = edge_data.get('relation', 'connected_to')
-                path_relations.append((source, relation, target))
+                path_relations.append((self._labels[source], relation, self._labels[target]))
             return path_relations
         except nx.NetworkXNoPath:
             return []
 
     def classify_question(self, question: str) -> tuple[str, list[str]]:
         question_lower = question.lower()
-        for q_type, patterns in self.question_patterns.items():
-            for pattern in patterns:
-                match = re.search(pattern, question_lower)
-                if match:
-                    if q_type == 'relationship':
-                        entities = [match.group(1).strip(), match.group(2).strip()]
-                    else:
-                        entities = [match.group(1).strip()]
-                    return q_type, entities
+        for pattern, q_type, is_pair in _QUESTION_PATTERNS:
+            match = pattern.search(question_lower)
+            if match:
+                if is_pair:
+                    entities = [match.group(1).strip(), match.group(2).strip()]
+                else:
+                    entities = [match.group(1).strip()]
+                return q_type, entities
         entities = self.extract_entities_from_question(question)
         return 'general', entities
 
@@ -99,8 +136,8 @@ class QueryRouter:
         similar_entities = self.find_similar_entities(entity)
         if not similar_entities:
             return f"I don't have information about '{entity}' in the knowledge graph."
-        target_entity = similar_entities[0]
-        info = self.get_entity_information(target_entity)
+        target_entity = self._labels[similar_entities[0]]
+        info = self.get_entity_information(similar_entities[0])
         if not info:
             return f"I found '{target_entity}' but don't have detailed information about it."
         answer_parts = [f"Based on the knowledge graph, here's what I know about {target_entity}:"]
@@ -123,17 +160,20 @@ class QueryRouter:
             return f"I don't have information about '{entity1}' in the knowledge graph."
         if not similar_entities2:
             return f"I don't have information about '{entity2}' in the knowledge graph."
-        target_entity1 = similar_entities1[0]
-        target_entity2 = similar_entities2[0]
-        if self.graph.has_edge(target_entity1, target_entity2):
-            edge_data = self.graph.edges[target_entity1, target_entity2]
+        node1 = similar_entities1[0]
+        node2 = similar_entities2[0]
+        target_entity1 = self._labels[node1]
+        target_entity2 = self._labels[node2]
+        adj = self.graph._adj
+        if node2 in adj[node1]:
+            edge_data = adj[node1][node2]
             relation = edge_data.get('relation', 'connected_to')
             return f"{target_entity1} {relation} {target_entity2}."
-        if self.graph.has_edge(target_entity2, target_entity1):
-            edge_data = self.graph.edges[target_entity2, target_entity1]
+        if node1 in adj[node2]:
+            edge_data = adj[node2][node1]
             relation = edge_data.get('relation', 'connected_to')
             return f"{target_entity2} {relation} {target_entity1}."
-        path = self.find_path_between_entities(target_entity1, target_entity2)
+        path = self.find_path_between_entities(node1, node2)
         if path:
             path_description = " -> ".join([f"{source} ({relation}) {target}" for source, relation, target in path])
             return f"There is an indirect relationship: {path_description}"
@@ -146,10 +186,9 @@ class QueryRouter:
         for entity in entities:
             similar_entities = self.find_similar_entities(entity)
             if similar_entities:
-                target_entity = similar_entities[0]
-                info = self.get_entity_information(target_entity)
+                info = self.get_entity_information(similar_entities[0])
                 if info:
-                    relevant_info.append(f"**{target_entity}**: Connected to {', '.join(info['neighbors'][:5])}")
+                    relevant_info.append(f"**{info['entity']}**: Connected to {', '.join(info['neighbors'][:5])}")
         if not relevant_info:
             return "I couldn't find relevant information for the entities mentioned in your question."
         return "Here's what I found:\n" + "\n".join(relevant_info)
@@ -158,7 +197,12 @@ class QueryRouter:
 def answer_question(graph: nx.DiGraph, question: str) -> str:
     if not graph or graph.number_of_nodes() == 0:
         return "The knowledge graph is empty. Please ingest some text first."
-    router = QueryRouter(graph)
+    return answer_question_with_router(QueryRouter(graph), question)
+
+
+def answer_question_with_router(router: QueryRouter, question: str) -> str:
+    if router.graph.number_of_nodes() == 0:
+        return "The knowledge graph is empty. Please ingest some text first."
     question_type, entities = router.classify_question(question)
     if question_type == 'what_is' and entities:
         return router.answer_what_is_question(entities[0])
@@ -180,9 +224,8 @@ def get_graph_summary(graph: nx.DiGraph) -> str:
         f"- {nx.number_weakly_connected_components(graph)} connected components"
     ]
     if graph.number_of_nodes() > 0:
-        node_degrees = dict(graph.degree())
-        top_entities = sorted(node_degrees.items(), key=lambda x: x[1], reverse=True)[:5]
+        top_entities = heapq.nlargest(5, graph.degree(), key=lambda x: x[1])
         summary_parts.append("\nTop entities by connections:")
         for entity, degree in top_entities:
-            summary_parts.append(f"- {entity} ({degree} connections)")
+            summary_parts.append(f"- {node_label(graph, entity)} ({degree} connections)")
     return "\n".join(summary_parts)
@@ -0,0 +1,100 @@
+"""
+Tests for the api module.
+"""
+
+import pytest
+from collections import OrderedDict
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from kgqa_agent import api
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(monkeypatch):
+    monkeypatch.setattr(api, "graph_storage", {})
+    monkeypatch.setattr(api, "answer_cache", OrderedDict())
+    monkeypatch.setattr(api, "_graphs_listing_cache", None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(api, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+class TestAnswerCache:
+    def test_cached_answer_is_returned_until_ttl(self, clock):
+        api._cache_answer("g1", "What is Alice?", "Alice works_at Acme.")
+        assert api._get_cached_answer("g1", "What is Alice?") == "Alice works_at Acme."
+        assert api._get_cached_answer("g1", "What is Bob?") is None
+        clock.value += api.ANSWER_CACHE_TTL_SECONDS
+        assert api._get_cached_answer("g1", "What is Alice?") is None
+        assert ("g1", "What is Alice?") not in api.answer_cache
+
+    def test_least_recently_used_entry_is_evicted(self, clock, monkeypatch):
+        monkeypatch.setattr(api, "ANSWER_CACHE_MAX_ENTRIES", 2)
+        api._cache_answer("g1", "q1", "a1")
+        api._cache_answer("g1", "q2", "a2")
+        assert api._get_cached_answer("g1", "q1") == "a1"
+        api._cache_answer("g1", "q3", "a3")
+        assert list(api.answer_cache) == [("g1", "q1"), ("g1", "q3")]
+
+    def test_delete_purges_answers_for_that_graph_only(self, clock):
+        api.graph_storage["g1"] = {}
+        api._cache_answer("g1", "q1", "a1")
+        api._cache_answer("g2", "q1", "a2")
+        response = TestClient(api.app).delete("/graphs/g1")
+        assert response.status_code == 200
+        assert list(api.answer_cache) == [("g2", "q1")]
+
+
+@pytest.fixture
+def client():
+    return TestClient(api.app)
+
+
+@pytest.fixture
+def graph_id(client):
+    response = client.post("/ingest", json={"texts": ["Alice works at Acme."]})
+    assert response.status_code == 200
+    return response.json()["graph_id"]
+
+
+class TestIngest:
+    def test_ingest_returns_float_density(self, client):
+        response = client.post("/ingest", json={"texts": ["Alice works at Acme."]})
+        assert response.status_code == 200
+        assert response.json()["stats"]["edges"] == 1
+        assert response.json()["stats"]["density"] == 0.5
+
+
+class TestETags:
+    @pytest.mark.parametrize("path, params", [
+        ("/query/{}", {"question": "Who is Alice?"}),
+        ("/graphs/{}/summary", {}),
+    ])
+    def test_conditional_get_returns_304(self, client, graph_id, path, params):
+        url = path.format(graph_id)
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        for if_none_match in (etag, f"W/{etag}", "*", f'"stale", {etag}'):
+            response = client.get(url, params=params, headers={"If-None-Match": if_none_match})
+            assert response.status_code == 304
+            assert response.headers["ETag"] == etag
+            assert response.content == b""
+
+    def test_different_question_gets_fresh_answer(self, client, graph_id):
+        etag = client.get(f"/query/{graph_id}", params={"question": "Who is Alice?"}).headers["ETag"]
+        response = client.get(f"/query/{graph_id}", params={"question": "What is Acme?"},
+                              headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_unknown_graph_is_404_even_with_wildcard(self, client):
+        response = client.get("/query/missing", params={"question": "Who is Alice?"},
+                              headers={"If-None-Match": "*"})
+        assert response.status_code == 404
+        response = client.get("/graphs/missing/summary", headers={"If-None-Match": "*"})
+        assert response.status_code == 404
@@ -4,9 +4,16 @@ Tests for the graph_builder module.
 
 import pytest
 import networkx as nx
+from collections import OrderedDict
+from kgqa_agent import graph_builder
 from kgqa_agent.graph_builder import build_graph, get_graph_stats, KnowledgeGraphBuilder
 
 
+def labelled_edges(graph):
+    labels = dict(graph.nodes(data='label'))
+    return {(labels[u], relation, labels[v]) for u, v, relation in graph.edges(data='relation')}
+
+
 class TestKnowledgeGraphBuilder:
     def setup_method(self):
         self.builder = KnowledgeGraphBuilder()
@@ -35,6 +42,57 @@ class TestKnowledgeGraphBuilder:
                 found_relation = True
         assert found_relation
 
+    def test_extract_relations_labels_each_type(self):
+        text = "Alice works at Acme. Bob lives in Paris. Carol founded Initech."
+        entities = {"Alice", "Acme", "Bob", "Paris", "Carol", "Initech"}
+        relations = self.builder.extract_relations(text, entities)
+        assert ("Alice", "works_at", "Acme") in relations
+        assert ("Bob", "lives_in", "Paris") in relations
+        assert ("Carol", "founded", "Initech") in relations
+
+    def test_extract_relations_accepts_part_of_an_entity(self):
+        text = "Page founded Google. Nobody founded Google."
+        entities = {"Larry Page", "Google"}
+        relations = self.builder.extract_relations(text, entities)
+        assert relations == [("Page", "founded", "Google")]
+
+    def test_build_graph_from_chunks_parallel_matches_sequential(self, monkeypatch):
+        people = ["Alice", "Bob", "Carol", "Dave", "Erin"]
+        places = ["Paris", "Berlin", "Madrid"]
+        chunks = [f"{people[i % 5]} lives in {places[i % 3]}. {people[i % 5]} works at Acme. ({i})" for i in range(80)]
+        sequential = KnowledgeGraphBuilder(parallel=False).build_graph_from_chunks(chunks)
+        monkeypatch.setattr(graph_builder, "_extraction_cache", OrderedDict())
+        monkeypatch.setattr(graph_builder, "_EXTRACTION_WORKERS", 2)
+        monkeypatch.setattr(graph_builder, "_extraction_executor", None)
+        parallel = KnowledgeGraphBuilder().build_graph_from_chunks(chunks)
+        executor = graph_builder._extraction_executor
+        assert executor is not None
+        assert executor._mp_context.get_start_method() != "fork"
+        monkeypatch.setattr(graph_builder, "_extraction_cache", OrderedDict())
+        KnowledgeGraphBuilder().build_graph_from_chunks(chunks)
+        assert graph_builder._extraction_executor is executor
+        executor.shutdown()
+        assert labelled_edges(parallel) == labelled_edges(sequential)
+        assert sequential.number_of_edges() > 0
+
+    def test_extract_chunks_reuses_results_for_repeated_chunks(self):
+        chunks = ["Alice works at Acme.", "Bob lives in Paris.", "Alice works at Acme."]
+        results = self.builder.extract_chunks(chunks)
+        assert results[0] is results[2]
+        assert results[0] == (frozenset({"Alice", "Acme"}), (("Alice", "works_at", "Acme"),))
+        assert self.builder.extract_chunks(chunks[:1])[0] is results[0]
+
+    def test_extract_chunks_accepts_lone_surrogates(self):
+        results = self.builder.extract_chunks(["Alice and Bob met. \ud800"])
+        assert results[0][0] == frozenset({"Alice", "Bob"})
+
+    def test_build_graph_from_chunks_uses_integer_ids(self):
+        graph = self.builder.build_graph_from_chunks(["Alice works at Acme."])
+        labels = dict(graph.nodes(data='label'))
+        assert all(isinstance(node, int) for node in graph.nodes())
+        assert sorted(labels.values()) == ["Acme", "Alice"]
+        assert labelled_edges(graph) == {("Alice", "works_at", "Acme")}
+
 
 class TestBuildGraphFunction:
     def test_build_graph_empty_input(self):
@@ -48,6 +106,35 @@ class TestBuildGraphFunction:
         assert isinstance(graph, nx.DiGraph)
         assert graph.number_of_nodes() > 0
 
+    def test_build_graph_chunks_on_word_boundaries(self):
+        texts = ["a " * 498 + "Stanford University is a school."]
+        graph = build_graph(texts)
+        assert set(dict(graph.nodes(data='label')).values()) == {"Stanford University"}
+
+    def test_fast_chunk_hard_cuts_long_words_and_skips_blank_windows(self):
+        text = "x" * 1500 + ". Alice works at Acme." + " " * 1200
+        chunks = graph_builder._fast_chunk(text)
+        assert all(chunk.strip() for chunk in chunks)
+        assert "Alice works at Acme." in "".join(chunks)
+        assert labelled_edges(build_graph([text])) == {("Alice", "works_at", "Acme")}
+        assert graph_builder._fast_chunk("") == []
+
+    def test_fast_chunk_keeps_lines_whole_like_text_splitter(self):
+        lines = ["Sundar Pichai works at Google.", "Larry Page founded Google.",
+                 "Satya Nadella works at Microsoft.", "Tim Cook lives in California.",
+                 "Sergey Brin created Android."]
+        for padding in range(0, 40, 4):
+            text = "\n".join(["Notes" + "." * padding] + lines * 8)
+            assert len(text) > KnowledgeGraphBuilder().chunk_size
+            graph, split_graph = build_graph([text]), build_graph([text], use_text_splitter=True)
+            assert labelled_edges(graph) == labelled_edges(split_graph)
+            assert sorted(dict(graph.nodes(data='label')).values()) == \
+                sorted(dict(split_graph.nodes(data='label')).values())
+
+    def test_build_graph_with_text_splitter(self):
+        texts = ["Alice works at Acme. Bob lives in Paris."]
+        assert labelled_edges(build_graph(texts, use_text_splitter=True)) == labelled_edges(build_graph(texts))
+
 
 class TestGetGraphStats:
     def test_get_stats_empty_graph(self):
@@ -4,7 +4,8 @@ Tests for the query_router module.
 
 import pytest
 import networkx as nx
-from kgqa_agent.query_router import QueryRouter, answer_question
+from kgqa_agent.graph_builder import build_graph
+from kgqa_agent.query_router import QueryRouter, answer_question, answer_question_with_router, get_graph_summary
 
 
 @pytest.fixture
@@ -37,14 +38,57 @@ class TestQueryRouter:
         answer = router.answer_what_is_question("Unknown Entity")
         assert "don't have information" in answer.lower()
 
+    def test_find_similar_entities(self, sample_graph):
+        router = QueryRouter(sample_graph)
+        assert router.find_similar_entities("google") == ["Google"]
+        assert router.find_similar_entities("Larry")[0] == "Larry Page"
+        assert router.find_similar_entities("Pich")[0] == "Sundar Pichai"
+        assert router.find_similar_entities("Sergei Brinn")[0] == "Sergey Brin"
+
+    def test_find_similar_entities_exact_match_wins(self, sample_graph):
+        sample_graph.add_node("Google Cloud", type="Product")
+        assert QueryRouter(sample_graph).find_similar_entities("GOOGLE") == ["Google"]
+
+    def test_find_path_between_entities(self, sample_graph):
+        sample_graph.add_edge("Google", "Sundar Pichai", relation="employs")
+        router = QueryRouter(sample_graph)
+        assert router.find_path_between_entities("Larry Page", "Sundar Pichai") == \
+            [("Larry Page", "co-founded", "Google"), ("Google", "employs", "Sundar Pichai")]
+        assert router.find_path_between_entities("Google", "Larry Page") == []
+
     def test_classify_question(self, sample_graph):
         router = QueryRouter(sample_graph)
         q_type, entities = router.classify_question("What is the relationship between Google and Larry Page?")
         assert q_type == "relationship"
         assert len(entities) == 2
 
+    def test_classify_question_preserves_pattern_order(self, sample_graph):
+        router = QueryRouter(sample_graph)
+        assert router.classify_question("Who is Larry Page?") == ("who_is", ["larry page"])
+        assert router.classify_question("How is Google related to Sergey Brin?") == \
+            ("relationship", ["google", "sergey brin"])
+
 
 def test_answer_question_with_empty_graph():
     graph = nx.DiGraph()
     answer = answer_question(graph, "What is Google?")
     assert "empty" in answer.lower()
+
+
+def test_answer_question_with_router_reuses_router(sample_graph):
+    router = QueryRouter(sample_graph)
+    question = "What is the relationship between Larry Page and Google?"
+    assert answer_question_with_router(router, question) == answer_question(sample_graph, question)
+    assert "co-founded" in answer_question_with_router(router, "Who is Larry Page?")
+
+
+def test_get_graph_summary_lists_most_connected_first(sample_graph):
+    summary = get_graph_summary(sample_graph)
+    assert "- 4 entities" in summary
+    assert summary.split("Top entities by connections:\n")[1].startswith("- Google (3 connections)")
+
+
+def test_answer_question_uses_labels_of_built_graph():
+    graph = build_graph(["Alice works at Acme. Bob lives in Paris."])
+    assert "Alice works_at Acme" in answer_question(graph, "What is Alice?")
+    assert answer_question(graph, "How is Bob related to Paris?") == "Bob lives_in Paris."